@@ -1,15 +1,78 @@
 # CRUD Desktop Application with Security and OOP
 
-import json
+import atexit
+import base64
+import orjson
 import os
-import jwt
-import datetime
+import queue
+import threading
+import time
+import hashlib
+import hmac
+import secrets
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; snapshots fall back to JSON
+    msgpack = None
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:  # Numba/NumPy are optional; fall back to Python scans
+    np = None
 
 SECRET_KEY = "your-secret-key"  # Will be used to sign JWT tokens
 
+# Precomputed once so token issuance is just a payload dump plus one HMAC
+_JWT_KEY = SECRET_KEY.encode()
+_JWT_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b'=')
+
+# Static (role, action) permission matrix; the employee self-update rule
+# depends on the target record and is handled separately in has_permission
+_PERM = {
+    ('admin', 'create'): True,
+    ('admin', 'read'): True,
+    ('admin', 'update'): True,
+    ('admin', 'delete'): True,
+    ('employee', 'read'): True,
+    ('manager', 'read'): True,
+}
+
+_ADMIN_ACTIONS = frozenset(('create', 'read', 'update', 'delete'))
+
+
+def _hash_password(salt, password):
+    """Salted SHA-256 password hash, hex-encoded for JSON storage"""
+    return hashlib.sha256(salt + password.encode()).hexdigest()
+
+
+def _issue_token(username, role, lifetime=3600):
+    """Sign an HS256 JWT directly via hmac, skipping per-call key setup"""
+    payload = orjson.dumps({
+        'exp': int(time.time()) + lifetime,
+        'username': username,
+        'role': role
+    })
+    msg = _JWT_HEADER + b'.' + base64.urlsafe_b64encode(payload).rstrip(b'=')
+    sig = hmac.new(_JWT_KEY, msg, 'sha256').digest()
+    return (msg + b'.' + base64.urlsafe_b64encode(sig).rstrip(b'=')).decode()
+
+
+if np is not None:
+    @njit(cache=True)
+    def _first_with_status(status_arr, target):
+        """JIT-compiled scan for the first index with the given status"""
+        for i in range(status_arr.shape[0]):
+            if status_arr[i] == target:
+                return i
+        return -1
+
 class User:
     """Base class for users with different roles"""
-    
+
+    __slots__ = ('username', 'password', 'role')
+
     def __init__(self, username, password, role):
         self.username = username
         self.password = password
@@ -21,14 +84,19 @@ class User:
 
 class Admin(User):
     """Class representing an Admin user"""
-    
+
+    __slots__ = ()
+
     def __init__(self, username, password):
         super().__init__(username, password, role='admin')
 
 
 class Employee:
     """Class representing an employee record"""
-    
+
+    __slots__ = ('id', 'name', 'position', 'department', 'status',
+                 'manager_approver', 'admin_approver')
+
     def __init__(self, id, name, position, department):
         self.id = id
         self.name = name
@@ -38,6 +106,12 @@ class Employee:
         self.manager_approver = None
         self.admin_approver = None
         
+    def __eq__(self, other):
+        return isinstance(other, Employee) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
     def to_dict(self):
         """Convert employee object to dictionary for JSON serialization"""
         return {
@@ -50,15 +124,14 @@ class Employee:
             'admin_approver': self.admin_approver
         }
         
-    @staticmethod
-    def from_dict(data):
-        """Create Employee object from dictionary"""
-        emp = Employee(
-            id=data['id'],
-            name=data['name'],
-            position=data['position'],
-            department=data['department']
-        )
+    @classmethod
+    def from_dict(cls, data):
+        """Create Employee object from dictionary, bypassing __init__"""
+        emp = cls.__new__(cls)
+        emp.id = data['id']
+        emp.name = data['name']
+        emp.position = data['position']
+        emp.department = data['department']
         emp.status = data.get('status', 'pending')
         emp.manager_approver = data.get('manager_approver')
         emp.admin_approver = data.get('admin_approver')
@@ -67,94 +140,288 @@ class Employee:
 
 class SecurityController:
     """Handles authentication and authorization"""
-    
+
+    # Rewrite the snapshot and truncate the WAL once this many ops accumulate
+    COMPACT_THRESHOLD = 256
+
     def __init__(self):
         self.current_user = None
-        self.employees = self.load_employees()
-        
+        # Snapshot format: msgpack is ~30% faster and smaller than JSON
+        self._fmt = 'msgpack' if msgpack is not None else 'json'
+        # Canonical store: insertion-ordered id->employee dict; the
+        # `employees` property exposes a list view for callers
+        self._employees_by_id = {emp.id: emp
+                                 for emp in self.load_employees()}
+        # Parallel status array for JIT-compiled scans, rebuilt lazily
+        self._status_arr = None
+        self._scan_cache = None
+        self._status_dirty = True
+        # Monotonic id counter; never reused, so deletes can't cause clashes
+        self._next_id = 1 + max(
+            (int(emp.id) for emp in self._employees_by_id.values()
+             if emp.id.isdigit()),
+            default=0)
+        # Memoized users list; reloaded only when the file changes on disk
+        self._users = None
+        self._users_mtime = None
+        # Background writer: snapshots are serialized and written off the
+        # caller's thread, landing atomically via os.replace
+        self._save_queue = queue.Queue()
+        self._save_thread = threading.Thread(target=self._save_worker,
+                                             daemon=True)
+        self._save_thread.start()
+        # Append-only write-ahead log; mutations append one line each and
+        # the snapshot is only rewritten on compaction
+        self._wal = open('data/employees.jsonl', 'ab')
+        if self._wal_ops >= self.COMPACT_THRESHOLD:
+            self.compact()
+        # Durability policy for WAL appends: 'immediate' fsyncs every op,
+        # 'batched' every _fsync_every ops, 'deferred' only at shutdown
+        self._durability = 'batched'
+        self._fsync_every = 16
+        self._dirty_count = 0
+        # Permission checker specialized for the logged-in user, compiled
+        # lazily on the first check and cached until the user changes
+        self._perm_fn = None
+        self._perm_user = None
+        atexit.register(self._flush)
+
+    @property
+    def employees(self):
+        """Insertion-ordered list view of the canonical employee dict"""
+        return list(self._employees_by_id.values())
+
     def load_users(self):
-        """Load users from JSON file"""
-        if not os.path.exists('data/users.json'):
+        """Load users from JSON file, cached until the file changes on disk"""
+        if self._users is not None:
+            try:
+                mtime = os.stat('data/users.json').st_mtime
+            except OSError:
+                mtime = None
+            if mtime == self._users_mtime:
+                return self._users
+
+        try:
+            with open('data/users.json', 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            raw = None
+
+        if raw is None:
             # Create default users if file doesn't exist
-            default_users = {
-                'users': [
-                    {'username': 'admin', 'password': 'admin123', 'role': 'admin'},
-                    {'username': 'employee', 'password': 'employee123', 'role': 'employee'},
-                    {'username': 'manager', 'password': 'manager123', 'role': 'manager'}
-                ]
-            }
+            users = []
+            for username, password, role in (
+                ('admin', 'admin123', 'admin'),
+                ('employee', 'employee123', 'employee'),
+                ('manager', 'manager123', 'manager'),
+            ):
+                salt = secrets.token_hex(16)
+                users.append({
+                    'username': username,
+                    'salt': salt,
+                    'hash': _hash_password(bytes.fromhex(salt), password),
+                    'role': role
+                })
             os.makedirs('data', exist_ok=True)
-            with open('data/users.json', 'w') as f:
-                json.dump(default_users, f, indent=4)
-            return default_users['users']
-        
-        with open('data/users.json', 'r') as f:
-            data = json.load(f)
-        return data['users']
-    
+            with open('data/users.json', 'wb') as f:
+                f.write(orjson.dumps({'users': users}, option=orjson.OPT_INDENT_2))
+        else:
+            users = orjson.loads(raw)['users']
+
+            # Migrate any legacy plaintext records to salted hashes in place
+            migrated = False
+            for user in users:
+                if 'password' in user:
+                    salt = secrets.token_hex(16)
+                    user['salt'] = salt
+                    user['hash'] = _hash_password(
+                        bytes.fromhex(salt), user.pop('password'))
+                    migrated = True
+            if migrated:
+                with open('data/users.json', 'wb') as f:
+                    f.write(orjson.dumps({'users': users},
+                                         option=orjson.OPT_INDENT_2))
+
+        # Index users by username so authenticate is a dict lookup
+        self._users_by_name = {user['username']: user for user in users}
+        self._users = users
+        try:
+            self._users_mtime = os.stat('data/users.json').st_mtime
+        except OSError:
+            self._users_mtime = None
+        return users
+
     def authenticate(self, username, password):
         """Authenticate user and set current user"""
-        users = self.load_users()
-        for user_data in users:
-            if user_data['username'] == username and user_data['password'] == password:
-                if user_data['role'] == 'admin':
-                    self.current_user = Admin(username=username, password=password)
-                else:
-                    self.current_user = User(
-                        username=username,
-                        password=password,
-                        role=user_data['role']
-                    )
-                
-                # Generate JWT token
-                payload = {
-                    'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1),
-                    'username': username,
-                    'role': user_data['role']
-                }
-                token = jwt.encode(payload, SECRET_KEY, algorithm='HS256')
-                print(f"JWT Token: {token}")
-                return True
-        return False
+        self.load_users()
+        user_data = self._users_by_name.get(username)
+        if not user_data:
+            return False
+
+        candidate = _hash_password(bytes.fromhex(user_data['salt']), password)
+        if not hmac.compare_digest(candidate, user_data['hash']):
+            return False
+
+        if user_data['role'] == 'admin':
+            self.current_user = Admin(username=username, password=password)
+        else:
+            self.current_user = User(
+                username=username,
+                password=password,
+                role=user_data['role']
+            )
+
+        # Generate JWT token
+        token = _issue_token(username, user_data['role'])
+        print(f"JWT Token: {token}")
+        return True
     
     def has_permission(self, action, target_employee=None):
         """Check if current user has permission for the action"""
         if not self.current_user:
             return False
-            
-        role = self.current_user.role
-        if action == 'create':
-            return role == 'admin'
-        elif action == 'read':
-            return role in ['admin', 'employee', 'manager']
-        elif action == 'update':
-            if role == 'admin':
-                return True
-            if role == 'employee' and target_employee:
-                return target_employee.id == self.current_user.username  # Assuming employee ID matches username
-            return False
-        elif action == 'delete':
-            return role == 'admin'
-        return False
+
+        if self.current_user is not self._perm_user:
+            self._perm_fn = self._compile_perm_fn(
+                self.current_user.role, self.current_user.username)
+            self._perm_user = self.current_user
+        return self._perm_fn(action, target_employee)
+
+    @staticmethod
+    def _compile_perm_fn(role, username):
+        """Build a permission checker specialized for one role"""
+        if role == 'admin':
+            return lambda action, target: action in _ADMIN_ACTIONS
+        if role == 'employee':
+            def check(action, target):
+                if action == 'read':
+                    return True
+                if action == 'update' and target is not None:
+                    return target.id == username  # Assuming employee ID matches username
+                return False
+            return check
+        if role == 'manager':
+            return lambda action, target: action == 'read'
+        return lambda action, target: _PERM.get((role, action), False)
         
     def load_employees(self):
-        """Load employees from JSON file"""
-        if not os.path.exists('data/employees.json'):
+        """Load the employee snapshot and replay the write-ahead log on top"""
+        self._wal_ops = 0
+        raw = None
+        for path in ('data/employees.mp', 'data/employees.json'):
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                break
+            except FileNotFoundError:
+                continue
+
+        if raw is None:
             os.makedirs('data', exist_ok=True)
-            with open('data/employees.json', 'w') as f:
-                json.dump({'employees': []}, f, indent=4)
-            return []
-            
-        with open('data/employees.json', 'r') as f:
-            data = json.load(f)
-        return [Employee.from_dict(emp) for emp in data['employees']]
-    
+            raw = b'{"employees":[]}'
+            with open('data/employees.json', 'wb') as f:
+                f.write(raw)
+
+        if not raw:
+            data = {'employees': []}
+        elif raw[:1] == b'{':
+            # Sniff the format: JSON snapshots start with '{', anything
+            # else is a msgpack map header
+            data = orjson.loads(raw)
+        else:
+            data = msgpack.unpackb(raw, raw=False)
+        employees = [Employee.from_dict(emp) for emp in data['employees']]
+
+        try:
+            wal = open('data/employees.jsonl', 'rb')
+        except FileNotFoundError:
+            wal = None
+
+        if wal is not None:
+            by_id = {emp.id: emp for emp in employees}
+            with wal as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    op = orjson.loads(line)
+                    self._wal_ops += 1
+                    if op['op'] == 'add':
+                        emp = Employee.from_dict(op['record'])
+                        employees.append(emp)
+                        by_id[emp.id] = emp
+                    elif op['op'] == 'upd':
+                        emp = by_id.get(op['id'])
+                        if emp:
+                            for field, value in op['fields'].items():
+                                setattr(emp, field, value)
+                    elif op['op'] == 'del':
+                        emp = by_id.pop(op['id'], None)
+                        if emp:
+                            employees.remove(emp)
+        return employees
+
     def save_employees(self):
-        """Save employees to JSON file"""
-        data = {'employees': [emp.to_dict() for emp in self.employees]}
-        with open('data/employees.json', 'w') as f:
-            json.dump(data, f, indent=4)
-            
+        """Queue a snapshot of the employee table for the writer thread"""
+        snapshot = [emp.to_dict() for emp in self._employees_by_id.values()]
+        self._save_queue.put(snapshot)
+
+    def _save_worker(self):
+        """Serialize queued snapshots and atomically replace the file"""
+        while True:
+            snapshot = self._save_queue.get()
+            try:
+                if self._fmt == 'msgpack':
+                    with open('data/employees.mp.tmp', 'wb') as f:
+                        packer = msgpack.Packer()
+                        f.write(packer.pack_map_header(1))
+                        f.write(packer.pack('employees'))
+                        f.write(packer.pack_array_header(len(snapshot)))
+                        for record in snapshot:
+                            f.write(packer.pack(record))
+                    os.replace('data/employees.mp.tmp', 'data/employees.mp')
+                else:
+                    with open('data/employees.json.tmp', 'wb') as f:
+                        f.write(b'{"employees":[')
+                        for i, record in enumerate(snapshot):
+                            if i:
+                                f.write(b',')
+                            f.write(orjson.dumps(record))
+                        f.write(b']}')
+                    os.replace('data/employees.json.tmp',
+                               'data/employees.json')
+            finally:
+                self._save_queue.task_done()
+
+    def _log_op(self, op):
+        """Append a single mutation record to the write-ahead log"""
+        self._wal.write(orjson.dumps(op) + b'\n')
+        self._wal.flush()
+        self._dirty_count += 1
+        if self._durability == 'immediate' or (
+                self._durability == 'batched'
+                and self._dirty_count % self._fsync_every == 0):
+            os.fsync(self._wal.fileno())
+        self._wal_ops += 1
+        if self._wal_ops >= self.COMPACT_THRESHOLD:
+            self.compact()
+
+    def _flush(self):
+        """Drain pending saves and sync the WAL; runs at shutdown via atexit"""
+        self._save_queue.join()
+        if not self._wal.closed:
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+
+    def compact(self):
+        """Rewrite the snapshot from current state and truncate the WAL"""
+        self.save_employees()
+        # The WAL must not be truncated before the snapshot has landed
+        self._save_queue.join()
+        self._wal.truncate(0)
+        self._wal_ops = 0
+
+
     # CRUD operations with permission checks
     def create_employee(self, name, position, department):
         """Create a new employee record"""
@@ -162,10 +429,12 @@ class SecurityController:
             raise PermissionError("You do not have permission to create employees")
             
         # Generate new ID
-        new_id = str(len(self.employees) + 1)
+        new_id = str(self._next_id)
+        self._next_id += 1
         new_employee = Employee(new_id, name, position, department)
-        self.employees.append(new_employee)
-        self.save_employees()
+        self._employees_by_id[new_employee.id] = new_employee
+        self._status_dirty = True
+        self._log_op({'op': 'add', 'record': new_employee.to_dict()})
         return new_employee
         
     def read_employees(self):
@@ -180,8 +449,28 @@ class SecurityController:
         if not self.has_permission('read'):
             raise PermissionError("You do not have permission to read employees")
             
-        for emp in self.employees:
-            if emp.id == employee_id:
+        return self._get_employee_unchecked(employee_id)
+
+    def _get_employee_unchecked(self, employee_id):
+        """Look up an employee by id without a permission check"""
+        return self._employees_by_id.get(employee_id)
+
+    def find_first_by_status(self, status):
+        """Find the first employee with the given approval status"""
+        if not self.has_permission('read'):
+            raise PermissionError("You do not have permission to read employees")
+
+        if np is not None and self._employees_by_id:
+            if self._status_dirty:
+                self._scan_cache = list(self._employees_by_id.values())
+                self._status_arr = np.array(
+                    [emp.status for emp in self._scan_cache], dtype='<U16')
+                self._status_dirty = False
+            idx = _first_with_status(self._status_arr, status)
+            return self._scan_cache[idx] if idx >= 0 else None
+
+        for emp in self._employees_by_id.values():
+            if emp.status == status:
                 return emp
         return None
         
@@ -190,7 +479,7 @@ class SecurityController:
         if not self.has_permission('update'):
             raise PermissionError("You do not have permission to update employees")
             
-        employee = self.read_employee(employee_id)
+        employee = self._get_employee_unchecked(employee_id)
         if not employee:
             raise ValueError("Employee not found")
             
@@ -198,14 +487,19 @@ class SecurityController:
         if self.current_user.role == 'employee' and employee_id != self.current_user.username:
             raise PermissionError("Employees can only update their own records")
             
+        fields = {}
         if name is not None:
             employee.name = name
+            fields['name'] = name
         if position is not None:
             employee.position = position
+            fields['position'] = position
         if department is not None:
             employee.department = department
-            
-        self.save_employees()
+            fields['department'] = department
+
+        if fields:
+            self._log_op({'op': 'upd', 'id': employee_id, 'fields': fields})
         return employee
         
     def delete_employee(self, employee_id):
@@ -213,12 +507,13 @@ class SecurityController:
         if not self.has_permission('delete'):
             raise PermissionError("You do not have permission to delete employees")
             
-        employee = self.read_employee(employee_id)
+        employee = self._get_employee_unchecked(employee_id)
         if not employee:
             raise ValueError("Employee not found")
             
-        self.employees.remove(employee)
-        self.save_employees()
+        self._employees_by_id.pop(employee_id)
+        self._status_dirty = True
+        self._log_op({'op': 'del', 'id': employee_id})
         return True
         
     def approve_employee_by_manager(self, employee_id):
@@ -226,7 +521,7 @@ class SecurityController:
         if not self.current_user or self.current_user.role != 'manager':
             raise PermissionError("Only managers can approve employees")
             
-        employee = self.read_employee(employee_id)
+        employee = self._get_employee_unchecked(employee_id)
         if not employee:
             raise ValueError("Employee not found")
             
@@ -235,7 +530,11 @@ class SecurityController:
             
         employee.status = 'manager_approved'
         employee.manager_approver = self.current_user.username
-        self.save_employees()
+        self._status_dirty = True
+        self._log_op({'op': 'upd', 'id': employee_id, 'fields': {
+            'status': employee.status,
+            'manager_approver': employee.manager_approver
+        }})
         return employee
         
     def approve_employee_by_admin(self, employee_id):
@@ -243,7 +542,7 @@ class SecurityController:
         if not self.current_user or self.current_user.role != 'admin':
             raise PermissionError("Only admins can give final approval")
             
-        employee = self.read_employee(employee_id)
+        employee = self._get_employee_unchecked(employee_id)
         if not employee:
             raise ValueError("Employee not found")
             
@@ -252,7 +551,11 @@ class SecurityController:
             
         employee.status = 'approved'
         employee.admin_approver = self.current_user.username
-        self.save_employees()
+        self._status_dirty = True
+        self._log_op({'op': 'upd', 'id': employee_id, 'fields': {
+            'status': employee.status,
+            'admin_approver': employee.admin_approver
+        }})
         return employee
 
 
@@ -281,9 +584,8 @@ if __name__ == "__main__":
         print("Authenticated as manager")
         try:
             # Find the pending employee
-            employees = controller.read_employees()
-            pending_emp = next((e for e in employees if e.status == 'pending'), None)
-            
+            pending_emp = controller.find_first_by_status('pending')
+
             if pending_emp:
                 approved_emp = controller.approve_employee_by_manager(pending_emp.id)
                 print(f"Manager approved employee: {approved_emp.name} (ID: {approved_emp.id}, Status: {approved_emp.status})")
@@ -300,9 +602,8 @@ if __name__ == "__main__":
         print("Authenticated as admin for final approval")
         try:
             # Find the manager-approved employee
-            employees = controller.read_employees()
-            manager_approved_emp = next((e for e in employees if e.status == 'manager_approved'), None)
-            
+            manager_approved_emp = controller.find_first_by_status('manager_approved')
+
             if manager_approved_emp:
                 final_approved_emp = controller.approve_employee_by_admin(manager_approved_emp.id)
                 print(f"Admin final approved employee: {final_approved_emp.name} (ID: {final_approved_emp.id}, Status: {final_approved_emp.status})")